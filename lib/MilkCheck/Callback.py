@@ -66,29 +66,43 @@ class CallbackHandler(object):
         if interface in self._interfaces:
             self._interfaces.remove(interface)
 
+    def has_interfaces(self):
+        '''Tell whether at least one interface has to be notified'''
+        return bool(self._interfaces)
+
     def notify(self, obj, ev_name):
         '''Notify the interfaces registered within the callback handler'''
+        self.notify_many(obj, (ev_name,))
+
+    def notify_many(self, obj, ev_names):
+        '''
+        Notify the interfaces registered within the callback handler of
+        several events raised on the same object. Events are delivered in
+        order, through a single walk over the interfaces.
+        '''
         for interface in self._interfaces:
-            if ev_name is EV_STATUS_CHANGED:
-                interface.ev_status_changed(obj)
-            elif ev_name is EV_STARTED:
-                interface.ev_started(obj)
-            elif ev_name is EV_COMPLETE:
-                interface.ev_complete(obj)
-            elif ev_name is EV_FINISHED:
-                interface.ev_finished(obj)
-            elif ev_name is EV_TRIGGER_DEP:
-                assert isinstance(obj, tuple)
-                (source, target) = obj
-                interface.ev_trigger_dep(source, target)
-            else:
-                interface.ev_delayed(obj)
+            for ev_name in ev_names:
+                if ev_name is EV_STATUS_CHANGED:
+                    interface.ev_status_changed(obj)
+                elif ev_name is EV_STARTED:
+                    interface.ev_started(obj)
+                elif ev_name is EV_COMPLETE:
+                    interface.ev_complete(obj)
+                elif ev_name is EV_FINISHED:
+                    interface.ev_finished(obj)
+                elif ev_name is EV_TRIGGER_DEP:
+                    assert isinstance(obj, tuple)
+                    (source, target) = obj
+                    interface.ev_trigger_dep(source, target)
+                else:
+                    interface.ev_delayed(obj)
 
 def call_back_self():
     """Return a singleton instance of the CallbackHandler class"""
-    if not CallbackHandler._instance:
-        CallbackHandler._instance = CallbackHandler()
-    return CallbackHandler._instance
+    handler = CallbackHandler._instance
+    if handler is None:
+        handler = CallbackHandler._instance = CallbackHandler()
+    return handler
 
 class CoreEvent(object):
     '''
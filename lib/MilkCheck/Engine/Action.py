@@ -36,7 +36,11 @@ It also contains the definition of a basic event handler and the
 ActionEventHandler and ActionManager.
 """
 
-import time
+try:
+    from time import monotonic
+except ImportError:
+    # Python 2 has no monotonic clock
+    from time import time as monotonic
 
 from ClusterShell.Worker.Popen import WorkerPopen
 from ClusterShell.Event import EventHandler
@@ -48,6 +52,7 @@ from MilkCheck.Callback import call_back_self
 from MilkCheck.Engine.BaseEntity import BaseEntity
 from MilkCheck.Engine.BaseEntity import DONE, TIMEOUT, ERROR, WAITING_STATUS, \
                                         NO_STATUS, DEP_ERROR, SKIPPED, WARNING
+from MilkCheck.Engine.BaseEntity import PENDING_STATUS
 from MilkCheck.Callback import EV_COMPLETE, EV_STARTED, EV_TRIGGER_DEP, \
                                EV_STATUS_CHANGED, EV_DELAYED, EV_FINISHED
 
@@ -95,14 +100,14 @@ class ActionManager(object):
             command = action.command
 
         if action.mode == 'exec':
-            wkr = ExecWorker(nodes=nodes, handler=ActionEventHandler(action),
+            wkr = ExecWorker(nodes=nodes, handler=action._handler,
                              timeout=action.timeout, command=command,
                              remote=action.remote)
             self._master_task.schedule(wkr)
         else:
             self._master_task.shell(command, nodes=nodes,
                                     timeout=action.timeout,
-                                    handler=ActionEventHandler(action),
+                                    handler=action._handler,
                                     remote=action.remote)
 
     def perform_delayed_action(self, action):
@@ -112,7 +117,7 @@ class ActionManager(object):
         if not action.parent.simulate:
             self.add_task(action)
             call_back_self().notify(action, EV_DELAYED)
-        self._master_task.timer(handler=ActionEventHandler(action),
+        self._master_task.timer(handler=action._handler,
                                 fire=action.delay)
 
     def add_task(self, task):
@@ -145,27 +150,29 @@ class ActionManager(object):
         fanout available and not any task owns the same fanout
         """
         assert task, 'You cannot take out a None task'
+        callback = call_back_self()
         # Task given as parameter is not already running
         if self._is_running_task(task):
             # Checkout the right value for the fanout
             fnt = task.fanout or self.default_fanout
             # Remove task
             self.entities[fnt].remove(task)
-            call_back_self().notify(task.parent, EV_COMPLETE)
+            callback.notify(task.parent, EV_COMPLETE)
 
             # Category is empty so we delete it and we update
-            # the value of the current fanout
+            # the value of the current fanout. It only changes if
+            # the category was the lowest one.
             if len(self.entities[fnt]) == 0:
                 del self.entities[fnt]
-                if self.entities:
-                    self.fanout = sorted(self.entities.keys())[0]
-                    self._master_task.set_info('fanout', self.fanout)
-                else:
+                if not self.entities:
                     self.fanout = None
+                elif fnt == self.fanout:
+                    self.fanout = min(self.entities)
+                    self._master_task.set_info('fanout', self.fanout)
             # Current number of task is decremented
             self._tasks_count -= 1
         if not self.tasks_count:
-            call_back_self().notify(task.parent, EV_FINISHED)
+            callback.notify(task.parent, EV_FINISHED)
 
     def _is_running_task(self, task):
         """
@@ -207,9 +214,10 @@ class ActionManager(object):
 
 def action_manager_self():
     """Return a singleton instance of the ActionManager class"""
-    if not ActionManager._instance:
-        ActionManager._instance = ActionManager()
-    return ActionManager._instance
+    manager = ActionManager._instance
+    if manager is None:
+        manager = ActionManager._instance = ActionManager()
+    return manager
 
 
 class MilkCheckEventHandler(EventHandler):
@@ -247,53 +255,61 @@ class ActionEventHandler(MilkCheckEventHandler):
     process an action.
     '''
     
-    def ev_hup(self, worker):
+    # Handlers use the ClusterShell 1.8+ signatures: for legacy ones,
+    # ClusterShell builds and emits a DeprecationWarning on each event.
+    # Default values keep them working with older ClusterShell versions.
+
+    def ev_hup(self, worker, node=None, rc=None):
         '''Update remaining target'''
         self._action.pending_target.remove(worker.current_node)
 
-    def ev_close(self, worker):
+    def ev_close(self, worker, timedout=None):
         '''
         This event is raised by the master task as soon as an action is
         done. It specifies the how the action will be computed.
         '''
+        action = self._action
+
         # Assign time duration to the current action
-        self._action.stop_time = time.time()
+        action.stop_time = monotonic()
 
         # Remove the current action from the running task, this will trigger
         # a redefinition of the current fanout
-        action_manager_self().remove_task(self._action)
+        action_manager_self().remove_task(action)
 
         # Get back the worker from ClusterShell
-        self._action.worker = worker
+        action.worker = worker
 
         # Checkout actions issues
-        errors = self._action.nb_errors()
-        timeouts = self._action.nb_timeout()
+        errors = action.nb_errors()
+        timeouts = action.nb_timeout()
         failed = errors + timeouts
 
         # Classic Action was failed
-        if failed and self._action.tries <= self._action.maxretry:
-            self._action.schedule()
+        if failed and action.tries <= action.maxretry:
+            action.schedule()
             return
 
         # There will be no more schedule(), save error node list for later
-        # propagation if required. Local action does not filter.
-        if self._action.target is not None:
-            nodes = self._action.nodes_error() | self._action.nodes_timeout()
-            self._action.filter_nodes(nodes)
+        # propagation if required. Local action does not filter and there is
+        # nothing to filter when no node failed.
+        if failed and action.target is not None:
+            nodes = action.nodes_error()
+            nodes.update(action.nodes_timeout())
+            action.filter_nodes(nodes)
 
         # timeout when more timeouts than permited
-        if timeouts > self._action.errors and errors == 0:
-            self._action.update_status(TIMEOUT)
+        if timeouts > action.errors and errors == 0:
+            action.update_status(TIMEOUT)
         # _action.errors has a higher priority than _action.warnings
         # failed when too many errors
-        elif failed > self._action.errors:
-            self._action.update_status(ERROR)
+        elif failed > action.errors:
+            action.update_status(ERROR)
         # Warning if there is more failed actions than the warning threshold
-        elif failed > self._action.warnings:
-            self._action.update_status(WARNING)
+        elif failed > action.warnings:
+            action.update_status(WARNING)
         else:
-            self._action.update_status(DONE)
+            action.update_status(DONE)
 
 class Action(BaseEntity):
     """
@@ -305,6 +321,10 @@ class Action(BaseEntity):
     LOCAL_VARIABLES = BaseEntity.LOCAL_VARIABLES.copy()
     LOCAL_VARIABLES['ACTION'] = 'name'
 
+    # Actions to prepare collected by the running prepare() walk, None when
+    # no walk is running
+    _prepare_batch = None
+
     def __init__(self, name, target=None, command=None, timeout=None, delay=0):
         BaseEntity.__init__(self, name=name, target=target, delay=delay)
 
@@ -327,6 +347,9 @@ class Action(BaseEntity):
         # Store pending targets
         self.pending_target = NodeSet()
 
+        # Event handler used by all the workers and timers of this action
+        self._handler = ActionEventHandler(self)
+
     def reset(self):
         '''
         Reset values of attributes in order to used the action multiple time.
@@ -353,33 +376,62 @@ class Action(BaseEntity):
 
     def prepare(self):
         '''
-        Prepare is a recursive method allowing the current action to prepare
-        actions which are in dependency with her first. An action can only
-        be prepared whether the dependencies are not currently running and if
-        the current action has not already a status.
+        Prepare allows the current action to prepare actions which are in
+        dependency with her first. An action can only be prepared whether
+        the dependencies are not currently running and if the current action
+        has not already a status.
+        Actions are processed depth-first from an explicit stack. Actions
+        triggered while processing one of them (when its status makes its
+        children ready) are added to this stack instead of being prepared
+        recursively, so deep graphs do not exhaust the interpreter stack.
         '''
-        deps_status = self.eval_deps_status()
-        # NO_STATUS and not any dep in progress for the current action
-        if self.status is NO_STATUS and deps_status is not WAITING_STATUS:
-
-            # Remove nodes marked on error by our filter dependencies
-            if self.target:
-                self.target -= self.parent.failed_nodes
-
-            if self.to_skip():
-                self.update_status(SKIPPED)
-            elif deps_status is DEP_ERROR or not self.parents:
-                self.update_status(WAITING_STATUS)
-                self.schedule()
-            elif deps_status is DONE:
-                # No need to do the action so just make it DONE
-                self.update_status(DONE)
-            else:
-                # Look for uncompleted dependencies
-                deps = self.search_deps([NO_STATUS])
-                # For each existing deps just prepare it
-                for dep in deps:
-                    dep.target.prepare()
+        if Action._prepare_batch is not None:
+            # A prepare() below us in the call stack will handle this action
+            Action._prepare_batch.append(self)
+            return
+
+        stack = [self]
+        seen = set(stack)
+        try:
+            while stack:
+                action = stack.pop()
+                # Collect actions triggered while processing this one
+                batch = Action._prepare_batch = []
+
+                deps_status = action.eval_deps_status()
+                # NO_STATUS and not any dep in progress for the current action
+                if action.status is NO_STATUS and \
+                   deps_status is not WAITING_STATUS:
+
+                    # Remove nodes marked on error by our filter dependencies.
+                    # Update the nodeset in place, not through the target
+                    # property setter which would copy and resolve it again.
+                    if action.target:
+                        action.target.difference_update(
+                                                    action.parent.failed_nodes)
+
+                    if action.to_skip():
+                        action.update_status(SKIPPED)
+                    elif deps_status is DEP_ERROR or not action.parents:
+                        action.update_status(WAITING_STATUS)
+                        action.schedule()
+                    elif deps_status is DONE:
+                        # No need to do the action so just make it DONE
+                        action.update_status(DONE)
+                    elif deps_status is NO_STATUS:
+                        # Look for uncompleted dependencies. Any lower
+                        # dependency status means none of them is still
+                        # NO_STATUS. Those shared by several paths are
+                        # only prepared once.
+                        for dep in action.search_deps([NO_STATUS]):
+                            if dep.target not in seen:
+                                seen.add(dep.target)
+                                batch.append(dep.target)
+
+                # Keep the processing order of a recursive walk
+                stack.extend(reversed(batch))
+        finally:
+            Action._prepare_batch = None
 
     def update_status(self, status):
         '''
@@ -388,22 +440,27 @@ class Action(BaseEntity):
         action triggers her direct dependencies.
         '''
         self.status = status
-        call_back_self().notify(self, EV_STATUS_CHANGED)
-        if status not in (NO_STATUS, WAITING_STATUS):
-            if not self.parent.simulate:
-                call_back_self().notify(self, EV_COMPLETE)
+        callback = call_back_self()
+        if status not in PENDING_STATUS:
+            simulate = self.parent.simulate
+            if simulate:
+                callback.notify(self, EV_STATUS_CHANGED)
+            else:
+                callback.notify_many(self, (EV_STATUS_CHANGED, EV_COMPLETE))
             if self.children:
                 for dep in self.children.values():
+                    tgt = dep.target
                     dep.filter_nodes(self.failed_nodes)
 
-                    if dep.target.is_ready():
-                        if not self.parent.simulate:
-                            call_back_self().notify(
-                            (self, dep.target), EV_TRIGGER_DEP)
-                        dep.target.prepare()
+                    if tgt.is_ready():
+                        if not simulate and callback.has_interfaces():
+                            callback.notify((self, tgt), EV_TRIGGER_DEP)
+                        tgt.prepare()
             else:
                 self.parent.filter_nodes(self.failed_nodes)
                 self.parent.update_status(self.status)
+        else:
+            callback.notify(self, EV_STATUS_CHANGED)
 
     def nodes_timeout(self):
         """Get nodeset of timeout nodes for this action."""
@@ -417,6 +474,8 @@ class Action(BaseEntity):
 
     def nb_timeout(self):
         """Get timeout node count."""
+        if self.worker and not isinstance(self.worker, WorkerPopen):
+            return self.worker.num_timeout()
         return len(self.nodes_timeout())
 
     def nodes_error(self):
@@ -436,6 +495,10 @@ class Action(BaseEntity):
 
     def nb_errors(self):
         """Get error node count."""
+        if self.worker and not isinstance(self.worker, WorkerPopen):
+            # Count nodes directly, without building any nodeset
+            return sum(1 for node, retcode in
+                       self.worker.iter_node_retcodes() if retcode != 0)
         return len(self.nodes_error())
 
     @property
@@ -443,7 +506,7 @@ class Action(BaseEntity):
         """
         Action duration in seconds and microseconds if done, None otherwise.
         """
-        if self.start_time and self.stop_time:
+        if self.start_time is not None and self.stop_time is not None:
             return self.stop_time - self.start_time
         else:
             return None
@@ -453,8 +516,8 @@ class Action(BaseEntity):
         Schedule the current action within the master task. The current action
         could be delayed or fired right now depending of it properties.
         '''
-        if not self.start_time:
-            self.start_time = time.time()
+        if self.start_time is None:
+            self.start_time = monotonic()
 
         self.pending_target.add(self.target)
 
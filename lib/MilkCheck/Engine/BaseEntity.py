@@ -84,12 +84,32 @@ DEP_ORDER = {
      LOCKED         : 3
 }
 
+# Status of an entity which is not processed yet
+PENDING_STATUS = frozenset((NO_STATUS, WAITING_STATUS))
+
+# Status of an entity which failed to be processed
+FAILED_STATUS = frozenset((ERROR, TIMEOUT, DEP_ERROR))
+
 # Strength of a dependency
 CHECK = "CHECK"
 REQUIRE = "REQUIRE"
 REQUIRE_WEAK = "REQUIRE_WEAK"
 FILTER = "FILTER"
 
+# Variable substitution pattern, compiled once for all entities
+VAR_DELIMITER = '%'
+VAR_PATTERN = re.compile(r"""
+  %(delim)s(?:
+    (?P<escaped>%(delim)s) | # Escape sequence of two delimiters
+    (?P<named>%(id)s)      | # delimiter and a Python identifier
+    {(?P<braced>%(id)s)}   | # delimiter and a braced identifier
+    \((?P<parenth>.+?)\)   | # delimiter and parenthesis
+    (?P<invalid>)            # Other ill-formed delimiter exprs
+  )""" % {
+        'delim' : VAR_DELIMITER,
+        'id' : r'[_a-z][_a-z0-9]*',
+    }, re.IGNORECASE | re.VERBOSE)
+
 
 class MilkCheckEngineError(Exception):
     """Base class for Engine exceptions."""
@@ -145,6 +165,9 @@ class Dependency(object):
     two objects whithout considering their types.
     '''
 
+    # Two dependencies are created for each edge of the graph
+    __slots__ = ('target', 'dep_type', '_internal')
+
     def __init__(self, target, dtype=REQUIRE, intr=False):
 
         # Object pointed by the dependency
@@ -183,7 +206,7 @@ class Dependency(object):
 
     def status(self):
         """Give entity status from a dependency point of view."""
-        if self.target.status in (ERROR, TIMEOUT, DEP_ERROR):
+        if self.target.status in FAILED_STATUS:
             if self.is_strong():
                 return DEP_ERROR
             else:
@@ -488,7 +511,7 @@ class BaseEntity(object):
         start due to unterminated dependencies.
         '''
         for dep in self.deps().values():
-            if dep.target.status in (NO_STATUS, WAITING_STATUS):
+            if dep.target.status in PENDING_STATUS:
                 return False
         return True
 
@@ -559,10 +582,11 @@ class BaseEntity(object):
         Evaluate the result of the dependencies in order to establish
         a status.
         '''
-        if len(self.deps()):
-            order = lambda dep: DEP_ORDER[dep.status()]
-            sorted_deps = sorted(self.deps().values(), key=order)
-            return sorted_deps[-1].status()
+        deps = self.deps()
+        if deps:
+            # Each dependency status is computed once, no need to sort them
+            return max((dep.status() for dep in deps.values()),
+                       key=DEP_ORDER.__getitem__)
         else:
             return MISSING
 
@@ -591,35 +615,29 @@ class BaseEntity(object):
         '''
         Return the value of the specified variable name.
 
-        If is not found in current object, it searches recursively in the
-        parent object.
+        If is not found in current object, it searches through the parent
+        objects, from the closest to the farthest.
         If it cannot solve the variable name, it raises UndefinedVariableError.
         '''
-        if varname in self.variables:
-            return self.variables[varname]
-        elif varname.upper() in self.LOCAL_VARIABLES:
-            value = self.LOCAL_VARIABLES[varname.upper()]
-            return self.resolve_property(value)
-        elif self.parent:
-            return self.parent._lookup_variable(varname)
-        else:
-            raise UndefinedVariableError(varname)
+        upname = varname.upper()
+        entity = self
+        while entity:
+            if varname in entity.variables:
+                return entity.variables[varname]
+            prop = entity.LOCAL_VARIABLES.get(upname)
+            if prop is not None:
+                return entity.resolve_property(prop)
+            entity = entity.parent
+        raise UndefinedVariableError(varname)
 
     def _substitute(self, template):
         """Substitute %xxx patterns from the provided template."""
-        delimiter = '%'
-        pattern = r"""
-          %(delim)s(?:
-            (?P<escaped>%(delim)s) | # Escape sequence of two delimiters
-            (?P<named>%(id)s)      | # delimiter and a Python identifier
-            {(?P<braced>%(id)s)}   | # delimiter and a braced identifier
-            \((?P<parenth>.+?)\)   | # delimiter and parenthesis
-            (?P<invalid>)            # Other ill-formed delimiter exprs
-          )""" % {
-                'delim' : delimiter,
-                'id' : r'[_a-z][_a-z0-9]*',
-            }
-        pattern = re.compile(pattern, re.IGNORECASE | re.VERBOSE)
+        delimiter = VAR_DELIMITER
+        pattern = VAR_PATTERN
+
+        # Most values do not use any variable, they are left as is
+        if delimiter not in template:
+            return template
 
         # Command substitution
         def _cmd_repl(raw):
@@ -661,7 +679,7 @@ class BaseEntity(object):
             raise ValueError('Unrecognized named group in pattern', pattern)
 
         # Check if content is only a variable pattern
-        mobj = re.match(pattern, template)
+        mobj = pattern.match(template)
         name = mobj and (mobj.group('named') or mobj.group('braced'))
         if name is not None and template == mobj.group(0):
             # In this case, simply replace it by variable content
@@ -44,7 +44,7 @@ from MilkCheck.Engine.BaseEntity import MilkCheckEngineError
 
 # Symbols
 from MilkCheck.Engine.BaseEntity import NO_STATUS, MISSING, DEP_ERROR
-from MilkCheck.Engine.BaseEntity import WAITING_STATUS
+from MilkCheck.Engine.BaseEntity import WAITING_STATUS, PENDING_STATUS
 from MilkCheck.Callback import EV_STATUS_CHANGED, EV_TRIGGER_DEP
 
 class ActionNotFoundError(MilkCheckEngineError):
@@ -155,12 +155,13 @@ class Service(BaseEntity):
         dependencies are solved start children dependencies.
         '''
         self.status = status
+        callback = call_back_self()
 
         if not self.simulate:
-            call_back_self().notify(self, EV_STATUS_CHANGED)
+            callback.notify(self, EV_STATUS_CHANGED)
 
         # I got a status so I'm DONE or DEP_ERROR and I'm not the calling point
-        if self.status not in (NO_STATUS, WAITING_STATUS) and not self.origin:
+        if self.status not in PENDING_STATUS and not self.origin:
 
             # Trigger each service which depend on me as soon as it does not
             # have WAITING_STATUS parents
@@ -175,8 +176,8 @@ class Service(BaseEntity):
                 dep.filter_nodes(self.failed_nodes)
 
                 if tgt.status is NO_STATUS and tgt.is_ready() and tgt._tagged:
-                    if not self.simulate:
-                        call_back_self().notify((self, tgt), EV_TRIGGER_DEP)
+                    if not self.simulate and callback.has_interfaces():
+                        callback.notify((self, tgt), EV_TRIGGER_DEP)
                     tgt.prepare()
 
     def _launch_action(self, action, status):
@@ -21,31 +21,38 @@ class EventTest(CoreEvent):
         '''Init last_event to gather the recieved event type'''
         CoreEvent.__init__(self)
         self.last_event = None
+        self.events = []
         call_back_self().attach(self)
 
     def ev_started(self, obj):
         '''Event triggered when recieve EV_STARTED'''
         self.last_event = EV_STARTED
+        self.events.append(EV_STARTED)
 
     def ev_complete(self, obj):
         '''Event triggered when recieve EV_COMPLETE'''
         self.last_event = EV_COMPLETE
+        self.events.append(EV_COMPLETE)
 
     def ev_status_changed(self, obj):
         '''Event triggered when recieve EV_STATUS_CHANGED'''
         self.last_event = EV_STATUS_CHANGED
+        self.events.append(EV_STATUS_CHANGED)
 
     def ev_delayed(self, obj):
         '''Event triggered when recieve EV_DELAYED'''
         self.last_event = EV_DELAYED
+        self.events.append(EV_DELAYED)
 
     def ev_trigger_dep(self, obj_source, obj_triggered):
         '''Event triggered when recieve EV_TRIGGER_DEP'''
         self.last_event = EV_TRIGGER_DEP
+        self.events.append(EV_TRIGGER_DEP)
 
     def ev_finished(self, obj):
         '''Event triggered when recieve EV_FINISHED'''
         self.last_event = EV_FINISHED
+        self.events.append(EV_FINISHED)
 
 class CallBackHandlerTest(TestCase):
     '''
@@ -76,6 +83,16 @@ class CallBackHandlerTest(TestCase):
         chandler.detach(obj)
         self.assertTrue(obj not in chandler._interfaces)
 
+    def test_has_interfaces(self):
+        '''Test whether interfaces are attached to the handler'''
+        chandler = call_back_self()
+        self.assertFalse(chandler.has_interfaces())
+        obj = object()
+        chandler.attach(obj)
+        self.assertTrue(chandler.has_interfaces())
+        chandler.detach(obj)
+        self.assertFalse(chandler.has_interfaces())
+
     def test_notify_interface(self):
         '''Test notification on event type'''
         event = EventTest()
@@ -89,6 +106,13 @@ class CallBackHandlerTest(TestCase):
         call_back_self().notify((None, None), EV_TRIGGER_DEP)
         self.assertEqual(event.last_event, evname)
 
+    def test_notify_many(self):
+        '''Test notification of several events at once'''
+        event = EventTest()
+        call_back_self().notify_many(None, (EV_STATUS_CHANGED, EV_COMPLETE))
+        self.assertEqual(event.events, [EV_STATUS_CHANGED, EV_COMPLETE])
+        self.assertEqual(event.last_event, EV_COMPLETE)
+
     def test_notimplemented(self):
         '''Test NotImplementedError'''
         result = []
@@ -7,6 +7,7 @@ This modules defines the tests cases targeting the BaseService
 """
 
 import socket
+import sys
 import tempfile
 from unittest import TestCase
 
@@ -14,7 +15,8 @@ from ClusterShell.NodeSet import NodeSet
 from ClusterShell.Task import task_self
 
 from MilkCheck.Engine.BaseEntity import NO_STATUS, DONE, ERROR, TIMEOUT, \
-                                        DEP_ERROR, SKIPPED, WARNING
+                                        DEP_ERROR, SKIPPED, WARNING, \
+                                        WAITING_STATUS
 from MilkCheck.Engine.Action import Action, ActionManager, action_manager_self
 from MilkCheck.Engine.Service import Service
 from MilkCheckTests import setup_sshconfig, cleanup_sshconfig
@@ -332,6 +334,70 @@ class ActionTest(TestCase):
         self.assertEqual(a4.status, ERROR)
         self.assertTrue(a4.duration)
 
+    def test_prepare_deep_graph(self):
+        """Test run a dependency chain deeper than the recursion limit"""
+        ser = Service('TEST')
+        actions = [Action('act%d' % idx, command=':') for idx in range(600)]
+        ser.add_actions(*actions)
+        for child, parent in zip(actions[1:], actions[:-1]):
+            child.add_dep(parent)
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(150)
+        try:
+            actions[-1].prepare()
+            self.assertEqual(actions[0].status, WAITING_STATUS)
+            for action in actions[1:]:
+                self.assertEqual(action.status, NO_STATUS)
+            # Completing the root action triggers the whole chain
+            action_manager_self().run()
+        finally:
+            sys.setrecursionlimit(limit)
+        for action in actions:
+            self.assertEqual(action.status, DONE)
+
+    def test_prepare_deep_skipped_graph(self):
+        """Test skipped actions do not recurse through the service chain"""
+        services = []
+        for idx in range(300):
+            ser = Service('ser%d' % idx)
+            ser.add_action(Action('start', target=NodeSet(), command=':'))
+            services.append(ser)
+        for child, parent in zip(services[1:], services[:-1]):
+            child.add_dep(parent)
+        # Service.prepare() still recurses over the dependencies it
+        # launches, completing them must not add more frames.
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(400)
+        try:
+            services[-1].run('start')
+        finally:
+            sys.setrecursionlimit(limit)
+        for ser in services:
+            self.assertEqual(ser.status, SKIPPED)
+
+    def test_prepare_shared_dep(self):
+        """Test prepare schedules only once an action shared by two paths"""
+        a1 = Action('start', command='/bin/true')
+        a2 = Action('start_engine', command='/bin/true')
+        a3 = Action('start_gui', command='/bin/true')
+        a4 = Action('empty_home', command='/bin/true')
+        a1.add_dep(a2)
+        a1.add_dep(a3)
+        a2.add_dep(a4)
+        a3.add_dep(a4)
+        ser = Service('TEST')
+        ser.add_actions(a1, a2, a3, a4)
+        a1.prepare()
+        self.assertEqual(a4.status, WAITING_STATUS)
+        self.assertEqual(a4.tries, 1)
+        for action in (a1, a2, a3):
+            self.assertEqual(action.status, NO_STATUS)
+            self.assertEqual(action.tries, 0)
+        action_manager_self().run()
+        self.assertEqual(a4.tries, 1)
+        for action in (a1, a2, a3, a4):
+            self.assertEqual(action.status, DONE)
+
     def test_action_with_variables(self):
         """Test variables in action command"""
         cmd = 'echo %([ "%VAR1" != "" ] && echo "-x %VAR1")'
@@ -514,6 +580,23 @@ class ActionManagerTest(TestCase):
         self.assertEqual(task_manager.tasks_count, 0)
         self.assertEqual(task_manager.tasks_done_count, 4)
 
+    def test_remove_task_higher_fanout(self):
+        """Test remove_task keeps fanout when a higher category is emptied"""
+        task_manager = action_manager_self()
+        task1 = Action('start')
+        task1.fanout = 12
+        task2 = Action('stop')
+        task2.fanout = 50
+        task_manager.add_task(task1)
+        task_manager.add_task(task2)
+        self.assertEqual(task_manager.fanout, 12)
+        task_manager.remove_task(task2)
+        self.assertEqual(task_manager.fanout, 12)
+        self.assertEqual(task_manager._master_task.info('fanout'), 12)
+        task_manager.remove_task(task1)
+        self.assertFalse(task_manager.fanout)
+        self.assertEqual(task_manager.tasks_count, 0)
+
     def test__is_running_task(self):
         """Test the behaviour of the method _is_running_task"""
         task_manager = action_manager_self()